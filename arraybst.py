@@ -0,0 +1,388 @@
+"""
+File: arraybst.py
+
+A binary search tree over numbers, stored as a sorted typed array.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from io import StringIO
+import sys
+
+from abstractcollection import AbstractCollection
+
+
+def _numpy():
+    """Returns the numpy module, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class ArrayBST(AbstractCollection):
+    """A binary search tree of int or float keys, kept as a sorted
+    array('q') or array('d'). The tree is implicit: the root of any
+    slice is its middle element, so it is always balanced, and a
+    key costs 8 bytes instead of a BSTNode object and a boxed number.
+    Equal keys are kept side by side, like a multiset LinkedBST."""
+
+    def __init__(self, sourceCollection=None, typecode="q"):
+        """Sets the initial state of self, which includes the
+        contents of sourceCollection, if it's present.
+        typecode is "q" for 64-bit ints or "d" for floats."""
+        AbstractCollection.__init__(self)
+        self._keys = array(typecode)
+        if sourceCollection:
+            self._keys.extend(sorted(sourceCollection))
+
+    @classmethod
+    def from_sorted(cls, items, typecode="q"):
+        """
+        Returns a tree holding items, which must already be sorted.
+        Raises: ValueError if items are not sorted.
+        """
+        tree = cls(typecode=typecode)
+        tree._keys.extend(items)
+        keys = tree._keys
+        for index in range(1, len(keys)):
+            if keys[index] < keys[index - 1]:
+                raise ValueError("Items are not sorted.")
+        return tree
+
+    def __add__(self, other):
+        """Returns a new tree of the same typecode, containing the
+        contents of self and other."""
+        result = type(self)(typecode=self._keys.typecode)
+        result._keys = array(self._keys.typecode,
+                             sorted(list(self._keys) + list(other)))
+        return result
+
+    def __len__(self):
+        """Returns the number of items in self."""
+        return len(self._keys)
+
+    def __str__(self):
+        """Returns a string representation with the tree rotated
+        90 degrees counterclockwise."""
+        buffer = StringIO()
+        self.dump(buffer)
+        return buffer.getvalue()
+
+    def dump(self, file=None, max_depth=None, max_nodes=None):
+        """
+        Writes the tree rotated 90 degrees counterclockwise to file
+        (sys.stdout by default), one line per node. Subtrees deeper
+        than max_depth are written as a single "..." line, and the
+        output stops with "..." after max_nodes nodes.
+        """
+        if file is None:
+            file = sys.stdout
+        write = file.write
+        keys = self._keys
+        stack = list()
+        low, high, level = 0, len(keys), 0
+        written = 0
+        while True:
+            while low < high:
+                if max_depth is not None and level > max_depth:
+                    write("| " * level + "...\n")
+                    break
+                mid = (low + high) // 2
+                stack.append((low, mid, level))
+                low, level = mid + 1, level + 1
+            if not stack:
+                return
+            low, mid, level = stack.pop()
+            if max_nodes is not None and written >= max_nodes:
+                write("...\n")
+                return
+            write("| " * level + str(keys[mid]) + "\n")
+            written += 1
+            high, level = mid, level + 1
+
+    def shape(self):
+        """
+        Returns a list whose i-th element is the number of nodes
+        at depth i.
+        """
+        counts = list()
+        level = [(0, len(self._keys))] if self._keys else []
+        while level:
+            counts.append(len(level))
+            next_level = list()
+            for low, high in level:
+                mid = (low + high) // 2
+                if low < mid:
+                    next_level.append((low, mid))
+                if mid + 1 < high:
+                    next_level.append((mid + 1, high))
+            level = next_level
+        return counts
+
+    def __iter__(self):
+        """Supports a preorder traversal on a view of self."""
+        keys = self._keys
+        stack = [(0, len(keys))]
+        while stack:
+            low, high = stack.pop()
+            if low < high:
+                mid = (low + high) // 2
+                yield keys[mid]
+                stack.append((mid + 1, high))
+                stack.append((low, mid))
+
+    def preorder(self):
+        """Supports a preorder traversal on a view of self."""
+        return iter(self)
+
+    def inorder(self):
+        """Supports an inorder traversal on a view of self."""
+        return iter(self._keys)
+
+    def postorder(self):
+        """Supports a postorder traversal on a view of self."""
+        keys = self._keys
+        stack = [(0, len(keys), False)]
+        while stack:
+            low, high, visited = stack.pop()
+            if low < high:
+                mid = (low + high) // 2
+                if visited:
+                    yield keys[mid]
+                else:
+                    stack.append((low, high, True))
+                    stack.append((mid + 1, high, False))
+                    stack.append((low, mid, False))
+
+    def levelorder(self):
+        """Supports a levelorder traversal on a view of self."""
+        keys = self._keys
+        level = [(0, len(keys))] if keys else []
+        while level:
+            next_level = list()
+            for low, high in level:
+                mid = (low + high) // 2
+                yield keys[mid]
+                if low < mid:
+                    next_level.append((low, mid))
+                if mid + 1 < high:
+                    next_level.append((mid + 1, high))
+            level = next_level
+
+    def __contains__(self, item):
+        """Returns True if target is found or False otherwise."""
+        index = bisect_left(self._keys, item)
+        return index < len(self._keys) and self._keys[index] == item
+
+    def find(self, item):
+        """If item matches an item in self, returns the
+        matched item, or None otherwise."""
+        index = bisect_left(self._keys, item)
+        if index < len(self._keys) and self._keys[index] == item:
+            return self._keys[index]
+        return None
+
+    def count(self, item):
+        """Returns the number of items in self equal to item."""
+        return bisect_right(self._keys, item) - \
+            bisect_left(self._keys, item)
+
+    def clear(self):
+        """Makes self become empty."""
+        del self._keys[:]
+
+    def add(self, item):
+        """Adds item to the tree. This shifts the larger keys, so
+        bulk loads should go through the constructor or from_sorted."""
+        insort(self._keys, item)
+
+    def remove(self, item):
+        """Precondition: item is in self.
+        Raises: KeyError if item is not in self.
+        postcondition: item is removed from self."""
+        index = bisect_left(self._keys, item)
+        if index == len(self._keys) or not self._keys[index] == item:
+            raise KeyError("Item not in tree.")
+        return self._keys.pop(index)
+
+    def remove_many(self, items):
+        """
+        Removes one occurrence of each of items in a single pass.
+        Items that are not in self are ignored.
+        Returns the number of items removed.
+        """
+        wanted = sorted(items)
+        kept = array(self._keys.typecode)
+        index = 0
+        removed = 0
+        for key in self._keys:
+            while index < len(wanted) and wanted[index] < key:
+                index += 1
+            if index < len(wanted) and wanted[index] == key:
+                index += 1
+                removed += 1
+            else:
+                kept.append(key)
+        self._keys = kept
+        return removed
+
+    def remove_range(self, low, high):
+        """
+        Removes every item between low and high, inclusive,
+        and returns how many were removed.
+        """
+        start = bisect_left(self._keys, low)
+        stop = bisect_right(self._keys, high)
+        del self._keys[start:stop]
+        return max(0, stop - start)
+
+    def replace(self, item, new_item):
+        """
+        If item is in self, replaces it with newItem and
+        returns the old item, or returns None otherwise.
+        Raises: ValueError if newItem is not equal to item, since
+        the item is its own key.
+        """
+        if not new_item == item:
+            raise ValueError("Replacement must have the same key.")
+        index = bisect_left(self._keys, item)
+        if index < len(self._keys) and self._keys[index] == item:
+            old_data = self._keys[index]
+            self._keys[index] = new_item
+            return old_data
+        return None
+
+    def height(self):
+        '''
+        Return the height of tree
+        :return: int
+        '''
+        return len(self._keys).bit_length() - 1
+
+    def is_balanced(self):
+        '''
+        Return True if tree is balanced
+        :return:
+        '''
+        return True
+
+    def rebalance(self):
+        '''
+        The implicit tree is always balanced.
+        :return:
+        '''
+        return self
+
+    def flush(self):
+        """Does nothing: the array has no write buffer."""
+
+    def successor(self, item):
+        """
+        Returns the smallest item that is larger than
+        item, or None if there is no such item.
+        """
+        index = bisect_right(self._keys, item)
+        return self._keys[index] if index < len(self._keys) else None
+
+    def predecessor(self, item):
+        """
+        Returns the largest item that is smaller than
+        item, or None if there is no such item.
+        """
+        index = bisect_left(self._keys, item)
+        return self._keys[index - 1] if index > 0 else None
+
+    def rangeFind(self, low, high):
+        '''
+        Returns a list of the items in the tree, where low <= item <= high.
+        :param low:
+        :param high:
+        :return:
+        '''
+        return self.range_find(low, high)
+
+    def range_find(self, num1, num2):
+        """
+        Gets two numbers, which establish
+        range in which numbers would be found.
+        """
+        start = bisect_left(self._keys, num1)
+        stop = bisect_right(self._keys, num2)
+        return self._keys[start:stop].tolist()
+
+    def split(self, item):
+        """
+        Splits self into two trees, holding the items below item
+        and the items at or above it, and returns them as a tuple.
+        self becomes empty.
+        """
+        index = bisect_left(self._keys, item)
+        left = ArrayBST(typecode=self._keys.typecode)
+        right = ArrayBST(typecode=self._keys.typecode)
+        left._keys = self._keys[:index]
+        right._keys = self._keys[index:]
+        self.clear()
+        return left, right
+
+    @classmethod
+    def join(cls, left, right):
+        """
+        Returns a new tree holding the items of left and right,
+        where every item of left is below every item of right.
+        left and right become empty.
+        Raises: ValueError if the trees hold different types or
+        their ranges overlap.
+        """
+        if left._keys.typecode != right._keys.typecode:
+            raise ValueError("Trees hold different key types.")
+        if left._keys and right._keys and \
+                not left._keys[-1] < right._keys[0]:
+            raise ValueError("Tree ranges overlap.")
+        result = cls(typecode=left._keys.typecode)
+        result._keys = left._keys + right._keys
+        left.clear()
+        right.clear()
+        return result
+
+    def _as_numpy(self):
+        """
+        Returns numpy and a zero-copy ndarray view of the keys,
+        or None and the keys if numpy is not installed.
+        """
+        numpy = _numpy()
+        if numpy is None or not self._keys:
+            return None, self._keys
+        dtype = numpy.int64 if self._keys.typecode == "q" \
+            else numpy.float64
+        return numpy, numpy.frombuffer(self._keys, dtype=dtype)
+
+    def contains_many(self, items):
+        """
+        Returns a list of booleans telling which of items are in
+        self, vectorized with numpy.searchsorted when it is
+        installed.
+        """
+        numpy, keys = self._as_numpy()
+        if numpy is None:
+            return [item in self for item in items]
+        probes = numpy.asarray(items)
+        index = numpy.searchsorted(keys, probes)
+        found = index < len(keys)
+        found[found] = keys[index[found]] == probes[found]
+        return found.tolist()
+
+    def count_range(self, lows, highs):
+        """
+        Returns, for each pair of lows and highs, the number of
+        items between them inclusive, vectorized with
+        numpy.searchsorted when it is installed.
+        """
+        numpy, keys = self._as_numpy()
+        if numpy is None:
+            return [max(0, bisect_right(keys, high) - bisect_left(keys, low))
+                    for low, high in zip(lows, highs)]
+        start = numpy.searchsorted(keys, numpy.asarray(lows), "left")
+        stop = numpy.searchsorted(keys, numpy.asarray(highs), "right")
+        return numpy.maximum(stop - start, 0).tolist()
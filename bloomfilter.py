@@ -0,0 +1,73 @@
+"""
+File: bloomfilter.py
+
+An approximate membership filter for keys of a binary search tree.
+"""
+
+from array import array
+from math import ceil, log
+import sys
+
+
+class BloomFilter(object):
+    """A blocked Bloom filter: a key that was added is always
+    reported as present, and a key that was not is reported as
+    absent except with probability about error_rate, as long as no
+    more than capacity keys are added. All the bits of a key lie in
+    one 64-bit word, so a probe costs one hash and one array read.
+    Keys are hashed with hash(), so a filter of strings is only
+    valid in the process that built it."""
+
+    # Bits set per key; fixed so that a probe is one expression.
+    PROBES = 4
+
+    def __init__(self, capacity, error_rate=0.01):
+        """Sizes the bit array for capacity keys at the given
+        false positive rate."""
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+        self._capacity = max(1, capacity)
+        # Bits per key for PROBES bits per key, plus a quarter for
+        # the uneven load of the 64-bit blocks.
+        bits_per_key = -self.PROBES / \
+            log(1 - error_rate ** (1 / self.PROBES)) * 1.25
+        self._blocks = array("Q", bytes(8 * max(
+            1, ceil(self._capacity * bits_per_key / 64))))
+        self._size = 0
+
+    def __len__(self):
+        """Returns the number of keys added to self."""
+        return self._size
+
+    def __sizeof__(self):
+        """Returns the size of self in bytes, bit array included."""
+        return object.__sizeof__(self) + sys.getsizeof(self._blocks)
+
+    def capacity(self):
+        """Returns the number of keys self was sized for."""
+        return self._capacity
+
+    def _block_and_mask(self, key):
+        """Returns the index of the block of key and the mask of
+        its bits in that block."""
+        first = hash(key) & 0xFFFFFFFFFFFFFFFF
+        mixed = first * 0x9E3779B97F4A7C15 >> 40
+        return first % len(self._blocks), \
+            1 << (mixed & 63) | 1 << (mixed >> 6 & 63) | \
+            1 << (mixed >> 12 & 63) | 1 << (mixed >> 18 & 63)
+
+    def add(self, key):
+        """Adds key to self."""
+        block, mask = self._block_and_mask(key)
+        self._blocks[block] |= mask
+        self._size += 1
+
+    def __contains__(self, key):
+        """Returns False if key was never added to self, or True
+        if it probably was."""
+        # _block_and_mask, inlined: this is the hot path of lookups.
+        first = hash(key) & 0xFFFFFFFFFFFFFFFF
+        mixed = first * 0x9E3779B97F4A7C15 >> 40
+        mask = 1 << (mixed & 63) | 1 << (mixed >> 6 & 63) | \
+            1 << (mixed >> 12 & 63) | 1 << (mixed >> 18 & 63)
+        return self._blocks[first % len(self._blocks)] & mask == mask
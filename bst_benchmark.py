@@ -0,0 +1,369 @@
+"""
+File: bst_benchmark.py
+
+Benchmarks for the binary search tree and its helper containers.
+Run it as a script to print the timings of every benchmark.
+"""
+
+import pickle
+from random import seed, shuffle
+import subprocess
+import sys
+from time import perf_counter
+
+from linkedbst import LinkedBST
+from linkedqueue import LinkedQueue
+from linkedstack import LinkedStack
+
+
+def timed(func, repeat=3):
+    """
+    Returns the best wall time of repeat calls to func.
+    """
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        spent = perf_counter() - start
+        if best is None or spent < best:
+            best = spent
+    return best
+
+
+def shuffled_tree(size, rand_seed=0):
+    """
+    Returns a LinkedBST holding 0..size-1 added in a seeded
+    random order.
+    """
+    lst = list(range(size))
+    seed(rand_seed)
+    shuffle(lst)
+    return LinkedBST(lst)
+
+
+def bench_containers(size=300000):
+    """
+    Times size pushes and pops through LinkedStack and LinkedQueue.
+    """
+
+    def stack_run():
+        stack = LinkedStack()
+        for item in range(size):
+            stack.push(item)
+        while not stack.isEmpty():
+            stack.pop()
+
+    def queue_run():
+        queue = LinkedQueue()
+        for item in range(size):
+            queue.add(item)
+        while not queue.isEmpty():
+            queue.pop()
+
+    return {"stack push/pop": timed(stack_run),
+            "queue add/pop": timed(queue_run)}
+
+
+def bench_traversal(size=200000):
+    """
+    Times full traversals of a randomly built tree.
+    """
+    tree = shuffled_tree(size)
+    return {"preorder iter": timed(lambda: list(tree)),
+            "inorder": timed(lambda: list(tree.inorder()))}
+
+
+def bench_import(module="linkedbst", repeat=5):
+    """
+    Times a cold interpreter start that imports module, minus the
+    time of a bare interpreter start.
+    """
+
+    def run(code):
+        return timed(lambda: subprocess.run([sys.executable, "-c", code],
+                                            check=True), repeat)
+
+    bare = run("pass")
+    return {f"import {module}": run(f"import {module}") - bare}
+
+
+def _receive_tree(conn):
+    """Receives a tree through conn and sends back its size."""
+    conn.send(len(conn.recv()))
+
+
+def bench_pickle(size=200000):
+    """
+    Compares the flat pickle of a tree with the pickle of its
+    nested node graph, and times sending the tree to a worker
+    process through a multiprocessing pipe.
+    """
+    from multiprocessing import Pipe, Process
+
+    tree = shuffled_tree(size).rebalance()
+    flat = pickle.dumps(tree, pickle.HIGHEST_PROTOCOL)
+    nested = pickle.dumps(vars(tree), pickle.HIGHEST_PROTOCOL)
+
+    def send(payload):
+        parent, child = Pipe()
+        worker = Process(target=_receive_tree, args=(child,))
+        worker.start()
+        parent.send(payload)
+        parent.recv()
+        worker.join()
+
+    return {"flat pickle MB": len(flat) / 2 ** 20,
+            "node pickle MB": len(nested) / 2 ** 20,
+            "flat round trip": timed(lambda: pickle.loads(
+                pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))),
+            "node round trip": timed(lambda: pickle.loads(
+                pickle.dumps(vars(tree), pickle.HIGHEST_PROTOCOL))),
+            "flat send to worker": timed(lambda: send(tree)),
+            "node send to worker": timed(lambda: send(vars(tree)))}
+
+
+def bench_parallel_build(copies=8, path="words.txt"):
+    """
+    Times sorting words.txt scaled up copies times, shuffled, in
+    this process, through a pool of one process and of every core,
+    and the full parallel build. A pickle round trip of the word
+    list shows what sending the items one by one would cost.
+    """
+    import os
+    import tempfile
+    from parallelbuild import parallel_build, sorted_runs, \
+        synthetic_words
+
+    words = synthetic_words(path, copies)
+    seed(0)
+    shuffle(words)
+    workers = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, "words.txt")
+        with open(source, "w", encoding="utf-8") as file:
+            file.write("\n".join(words) + "\n")
+        return {f"sort x{copies}, in process": timed(
+                    lambda: sorted(read_words(source)), 1),
+                f"pickle x{copies} words": timed(
+                    lambda: pickle.loads(pickle.dumps(words)), 1),
+                f"sort x{copies}, 1 proc": timed(
+                    lambda: sorted_runs(source, workers=1), 1),
+                f"sort x{copies}, {workers} procs": timed(
+                    lambda: sorted_runs(source, workers=workers), 1),
+                f"build x{copies}, {workers} procs": timed(
+                    lambda: parallel_build(source, workers=workers), 1)}
+
+
+def bench_numeric(size=200000, probes=100000):
+    """
+    Compares lookups and range counts on a LinkedBST and an
+    ArrayBST holding the same integer keys.
+    """
+    from arraybst import ArrayBST
+
+    linked = shuffled_tree(size).rebalance()
+    packed = ArrayBST(range(size))
+    queries = list(range(0, 2 * size, 2 * size // probes))
+    lows = queries
+    highs = [low + 100 for low in lows]
+    return {"LinkedBST find": timed(
+                lambda: [linked.find(item) for item in queries]),
+            "ArrayBST find": timed(
+                lambda: [packed.find(item) for item in queries]),
+            "ArrayBST contains_many": timed(
+                lambda: packed.contains_many(queries)),
+            "LinkedBST range counts": timed(
+                lambda: [len(linked.range_find(low, high))
+                         for low, high in zip(lows[:2000], highs)]),
+            "ArrayBST count_range": timed(
+                lambda: packed.count_range(lows[:2000], highs[:2000]))}
+
+
+# Peak traced allocation, in MB, that each bench_memory workload
+# may reach before check_memory reports a regression.
+MEMORY_BUDGETS = {"add build": 20.0,
+                  "rebalance": 2.5,
+                  "inorder": 0.1,
+                  "range_find": 0.25,
+                  "demo lookups": 40.0}
+
+
+def read_words(path="words.txt"):
+    """Returns the words of the file at path, one per line."""
+    with open(path, "r", encoding="utf-8") as file:
+        return [line.rstrip("\n") for line in file if line.strip()]
+
+
+def traced_peak(func):
+    """
+    Returns the peak memory, in MB, traced by tracemalloc while
+    func runs.
+    """
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(path="words.txt"):
+    """
+    Measures the peak allocation of building a tree of the words
+    by add, rebalancing it, traversing it inorder, a range_find
+    over a tenth of it, and demo_bst-style lookups.
+    """
+    words = read_words(path)
+    seed(0)
+    shuffle(words)
+    tree = LinkedBST()
+    demo = LinkedBST()
+
+    def add_build():
+        for word in words:
+            tree.add(word)
+
+    def demo_lookups():
+        word_lst, searched = demo.random_words(path)
+        shuffle(word_lst)
+        demo.search_in_lst(LinkedBST(word_lst), searched)
+
+    results = {"add build": traced_peak(add_build)}
+    results["rebalance"] = traced_peak(tree.rebalance)
+    results["inorder"] = traced_peak(lambda: sum(1 for _ in tree.inorder()))
+    results["range_find"] = traced_peak(lambda: tree.range_find("m", "n"))
+    results["demo lookups"] = traced_peak(demo_lookups)
+    return {name + " MB": peak for name, peak in results.items()}
+
+
+def check_memory(results):
+    """
+    Returns the messages of the bench_memory results above their
+    MEMORY_BUDGETS.
+    """
+    failures = list()
+    for name, budget in MEMORY_BUDGETS.items():
+        peak = results.get(name + " MB")
+        if peak is not None and peak > budget:
+            failures.append(f"{name}: {peak:.1f} MB > {budget:.1f} MB")
+    return failures
+
+
+def bench_ingest(path="words.txt", prefix=10000, buffer_size=1024):
+    """
+    Times adding words one by one, plain and write-buffered: the
+    first prefix words in file order, whose near-sorted order
+    degenerates a plain tree, and all of the words shuffled.
+    """
+    words = read_words(path)
+    shuffled = list(words)
+    seed(0)
+    shuffle(shuffled)
+
+    def ingest(items, **options):
+        tree = LinkedBST(**options)
+        for item in items:
+            tree.add(item)
+        tree.flush()
+
+    results = dict()
+    for order, items in ((f"file order {prefix}", words[:prefix]),
+                         ("file order all", words),
+                         ("shuffled all", shuffled)):
+        if order != "file order all":
+            results[f"{order}, plain"] = timed(lambda: ingest(items), 1)
+        for policy in ("rebuild", "merge"):
+            results[f"{order}, {policy}"] = timed(
+                lambda: ingest(items, buffer_size=buffer_size,
+                               compaction=policy), 1)
+    return results
+
+
+def miss_heavy_queries(words, count=10000, miss_ratio=0.6, rand_seed=0):
+    """
+    Returns count seeded queries drawn from words, of which about
+    miss_ratio are misspellings that are not in words.
+    """
+    from random import Random
+
+    rand = Random(rand_seed)
+    known = set(words)
+    queries = list()
+    while len(queries) < count:
+        word = rand.choice(words)
+        if rand.random() < miss_ratio:
+            word = word[:-1] + rand.choice("qxzj") + word[-1:]
+            if word in known:
+                continue
+        queries.append(word)
+    return queries
+
+
+def bench_bloom(path="words.txt", error_rate=0.01):
+    """
+    Times a miss-heavy query mix against the words with and
+    without a Bloom filter, and reports the observed false
+    positive rate and the filter's memory.
+    """
+    words = sorted(read_words(path))
+    queries = miss_heavy_queries(words)
+    plain = LinkedBST.from_sorted(words)
+    filtered = LinkedBST.from_sorted(words, bloom_error_rate=error_rate)
+    known = set(words)
+    misses = [word for word in queries if word not in known]
+    false_hits = sum(1 for word in misses if word in filtered._bloom)
+    return {"find, no filter": timed(
+                lambda: [plain.find(word) for word in queries]),
+            "find, Bloom filter": timed(
+                lambda: [filtered.find(word) for word in queries]),
+            "false positive rate": false_hits / len(misses),
+            "filter MB": (filtered.memory_usage()["container_bytes"] -
+                          plain.memory_usage()["container_bytes"]) / 2 ** 20}
+
+
+def bench_hash_index(path="words.txt", count=10000):
+    """
+    Times exact lookups of words with and without the hash index,
+    range_find on the indexed tree, and reports the memory the
+    index adds.
+    """
+    from random import Random
+
+    words = sorted(read_words(path))
+    queries = Random(0).choices(words, k=count)
+    plain = LinkedBST.from_sorted(words)
+    indexed = LinkedBST.from_sorted(words, hash_index=True)
+    return {"find, tree only": timed(
+                lambda: [plain.find(word) for word in queries]),
+            "find, hash index": timed(
+                lambda: [indexed.find(word) for word in queries]),
+            "range_find, tree only": timed(
+                lambda: plain.range_find("m", "n")),
+            "range_find, hash index": timed(
+                lambda: indexed.range_find("m", "n")),
+            "tree MB": plain.memory_usage()["total_bytes"] / 2 ** 20,
+            "tree + index MB":
+                indexed.memory_usage()["total_bytes"] / 2 ** 20}
+
+
+def main():
+    if "--check-memory" in sys.argv[1:]:
+        failures = check_memory(bench_memory())
+        for failure in failures:
+            print(failure)
+        return 1 if failures else 0
+    for bench in (bench_import, bench_containers, bench_traversal,
+                  bench_pickle, bench_parallel_build, bench_numeric,
+                  bench_memory, bench_ingest, bench_bloom,
+                  bench_hash_index):
+        for name, spent in bench().items():
+            unit = " s" if isinstance(spent, float) and \
+                not name.endswith(("MB", "rate")) else ""
+            print(f"{name:<24} {spent:.4f}{unit}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+File: bst_lookup.py
+
+Command-line word lookups over a LinkedBST index.
+
+    python bst_lookup.py find apple pear
+    python bst_lookup.py range apple apricot
+    python bst_lookup.py batch < queries.txt
+    python bst_lookup.py serve --socket /tmp/bst.sock &
+    python bst_lookup.py --socket /tmp/bst.sock prefix appl
+
+Every query prints its answers one per line: find, successor and
+predecessor print the matched item or None, range and prefix print
+every item in the range. In batch mode each input line is a query
+such as "prefix appl". With --socket the queries are answered by a
+running "serve" daemon, which keeps the index warm between calls.
+"""
+
+import argparse
+import os
+import stat
+import sys
+
+from linkedbst import LinkedBST
+
+COMMANDS = {"find": 1, "range": 2, "prefix": 1,
+            "successor": 1, "predecessor": 1}
+DEFAULT_WORDS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "words.txt")
+
+
+def load_index(path):
+    """
+    Builds a balanced tree over the words of the file at path,
+    one word per line.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        words = sorted(line.rstrip("\n") for line in file)
+    return LinkedBST.from_sorted((word for word in words if word),
+                                 multiset=True)
+
+
+def parse_query(line):
+    """
+    Splits a batch line into a (command, args) pair.
+    Raises: ValueError if the line is not a valid query.
+    """
+    parts = line.split()
+    if not parts or parts[0] not in COMMANDS or \
+            len(parts) - 1 != COMMANDS[parts[0]]:
+        raise ValueError(f"Bad query: {line.strip()!r}")
+    return parts[0], parts[1:]
+
+
+def answer(index, command, args):
+    """
+    Yields the output lines of one query against index.
+    """
+    if command == "find":
+        yield str(index.find(args[0]))
+    elif command == "successor":
+        yield str(index.successor(args[0]))
+    elif command == "predecessor":
+        yield str(index.predecessor(args[0]))
+    elif command == "range":
+        for item in index.range_find(args[0], args[1]):
+            yield str(item)
+    elif command == "prefix":
+        prefix = args[0]
+        for item in index.range_find(prefix, prefix + chr(0x10FFFF)):
+            if item.startswith(prefix):
+                yield item
+
+
+def queries_from_args(command, args):
+    """
+    Yields the (command, args) queries given on the command line;
+    find, prefix, successor and predecessor take several words.
+    """
+    arity = COMMANDS[command]
+    if not args or len(args) % arity:
+        raise ValueError(f"{command} expects {arity} argument(s) per query")
+    for start in range(0, len(args), arity):
+        yield command, args[start:start + arity]
+
+
+def run_local(index, queries, out):
+    """Answers queries against an in-process index."""
+    for command, args in queries:
+        for line in answer(index, command, args):
+            out.write(line + "\n")
+
+
+def run_remote(path, queries, out):
+    """
+    Sends queries to the daemon listening on the Unix socket at
+    path and streams its answers to out.
+    """
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(path)
+        reader = conn.makefile("r", encoding="utf-8")
+        writer = conn.makefile("w", encoding="utf-8")
+        for command, args in queries:
+            writer.write("\t".join([command] + args) + "\n")
+            writer.flush()
+            for line in reader:
+                if line == "\n":
+                    break
+                out.write(line)
+
+
+def serve(index, path):
+    """
+    Answers queries over the Unix socket at path until interrupted.
+    Each request is a tab-separated query line; its answer lines
+    are followed by an empty line. A stale socket left at path is
+    replaced, but any other file there is left alone.
+    """
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        """Answers the queries of one client connection."""
+
+        def handle(self):
+            for raw in self.rfile:
+                parts = raw.decode("utf-8").rstrip("\n").split("\t")
+                lines = list()
+                if parts[0] in COMMANDS and \
+                        len(parts) - 1 == COMMANDS[parts[0]]:
+                    lines = answer(index, parts[0], parts[1:])
+                for line in lines:
+                    self.wfile.write(line.encode("utf-8") + b"\n")
+                self.wfile.write(b"\n")
+                self.wfile.flush()
+
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+def main(argv=None):
+    """Runs the command line given in argv, or in sys.argv."""
+    parser = argparse.ArgumentParser(
+        description="Look words up in a binary search tree index.")
+    parser.add_argument("--words", default=DEFAULT_WORDS,
+                        help="word file to index, one word per line")
+    parser.add_argument("--socket",
+                        help="Unix socket of a running serve daemon")
+    parser.add_argument("command", choices=sorted(COMMANDS) +
+                        ["batch", "serve"])
+    parser.add_argument("args", nargs="*")
+    options = parser.parse_args(argv)
+
+    if options.command == "serve":
+        if not options.socket:
+            parser.error("serve needs --socket")
+        try:
+            serve(load_index(options.words), options.socket)
+        except OSError as error:
+            parser.error(f"{error.filename or options.socket}: "
+                         f"{error.strerror or error}")
+        return 0
+
+    try:
+        if options.command == "batch":
+            queries = (parse_query(line) for line in sys.stdin
+                       if line.strip())
+        else:
+            queries = queries_from_args(options.command, options.args)
+        if options.socket:
+            run_remote(options.socket, queries, sys.stdout)
+        else:
+            run_local(load_index(options.words), queries, sys.stdout)
+    except ValueError as error:
+        parser.error(str(error))
+    except OSError as error:
+        parser.error(f"{error.filename or options.socket}: "
+                     f"{error.strerror or error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
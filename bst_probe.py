@@ -64,8 +64,8 @@ def main():
     #random.shuffle(lyst)
     tree = LinkedBST(lyst)
     print(tree, tree.height())
-    print(tree.isBalanced())
-    print(tree.rangeFind(30,91))
+    print(tree.is_balanced())
+    print(tree.range_find(30,91))
     print(tree.successor(20))
     print(tree.predecessor(50))
     tree.rebalance()
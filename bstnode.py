@@ -4,9 +4,16 @@ Author: Ken Lambert
 """
 
 class BSTNode(object):
-    """Represents a node for a linked binary search tree."""
+    """Represents a node for a linked binary search tree.
+    The key is the value the node is ordered by; it defaults
+    to the data itself. The count is the number of equal
+    items the node stands for in a multiset tree."""
 
-    def __init__(self, data, left = None, right = None):
+    __slots__ = ("data", "left", "right", "key", "count")
+
+    def __init__(self, data, left = None, right = None, key = None):
         self.data = data
         self.left = left
         self.right = right
+        self.key = data if key is None else key
+        self.count = 1
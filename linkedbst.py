@@ -8,71 +8,389 @@ from abstractcollection import AbstractCollection
 from bstnode import BSTNode
 from linkedstack import LinkedStack
 from linkedqueue import LinkedQueue
-from math import log
-from random import choices
+from bisect import bisect_left, bisect_right, insort
+from io import StringIO
+import sys
 
 
 class LinkedBST(AbstractCollection):
     """An link-based binary search tree implementation."""
 
-    def __init__(self, sourceCollection=None):
+    def __init__(self, sourceCollection=None, key=None, multiset=False,
+                 buffer_size=0, buffer_ratio=0.25, compaction="rebuild",
+                 bloom_error_rate=None, hash_index=False):
         """Sets the initial state of self, which includes the
-        contents of sourceCollection, if it's present."""
+        contents of sourceCollection, if it's present.
+        If key is given, it is called once per item on insertion
+        (and once per probe on lookup), and the tree is ordered
+        by its results instead of by the items themselves.
+        If multiset is True, equal items share one node that
+        counts them, instead of being chained to the right.
+        If buffer_size is positive, added items wait in a write
+        buffer, a dict from key to items that is sorted only when
+        it is flushed, until it holds buffer_size items and
+        buffer_ratio times as many items as the tree; see flush
+        for the compaction policies. Lookups, successor,
+        predecessor and range_find read the buffer without
+        flushing it; other reads flush it with the "merge"
+        policy. Buffered keys must be hashable.
+        If bloom_error_rate is given, a Bloom filter over the keys
+        with that false positive rate answers most lookups of
+        missing items without a descent; keys must be hashable.
+        If hash_index is True, a dict from each key to its node
+        makes find, __contains__ and replace O(1) on average, at
+        the cost of one dict entry per distinct key; keys must be
+        hashable."""
+        if compaction not in ("rebuild", "merge"):
+            raise ValueError("Unknown compaction policy.")
         self._root = None
+        self._key = key
+        self._multiset = multiset
+        self._buffer_size = buffer_size
+        self._buffer_ratio = buffer_ratio
+        self._compaction = compaction
+        self._buffer = dict()
+        self._buffered = 0
+        self._buffer_keys = None
+        self._modcount = 0
+        self._bloom_error_rate = bloom_error_rate
+        self._bloom = self._new_bloom(1024)
+        self._bloom_removed = 0
+        self._index = dict() if hash_index else None
         AbstractCollection.__init__(self, sourceCollection)
 
+    @classmethod
+    def from_sorted(cls, items, **options):
+        """
+        Returns a balanced tree built in linear time from items,
+        which must already be sorted by key. The options are
+        passed on to the constructor.
+        Raises: ValueError if items are not sorted.
+        """
+        tree = cls(**options)
+        multiset = tree._multiset
+        nodes = list()
+        size = 0
+        for item in items:
+            key = tree._key_of(item)
+            if nodes and key < nodes[-1].key:
+                raise ValueError("Items are not sorted.")
+            size += 1
+            if multiset and nodes and key == nodes[-1].key:
+                nodes[-1].count += 1
+            else:
+                nodes.append(BSTNode(item, key=key))
+        tree._root = cls._build_balanced(nodes)
+        tree._size = size
+        tree._reindex()
+        return tree
+
+    def _key_of(self, item):
+        """Returns the key item is ordered by."""
+        if self._key is None:
+            return item
+        return self._key(item)
+
+    def _new_bloom(self, capacity):
+        """
+        Returns an empty Bloom filter for capacity keys, or None
+        if self does not use one.
+        """
+        if self._bloom_error_rate is None:
+            return None
+        from bloomfilter import BloomFilter
+
+        return BloomFilter(capacity, self._bloom_error_rate)
+
+    def _rebuild_bloom(self):
+        """
+        Rebuilds the Bloom filter, if self has one, over the keys in
+        the tree and in the write buffer, sized for twice as many.
+        """
+        bloom = self._new_bloom(max(1024, 2 * self._size))
+        if bloom is None:
+            return
+        for node in self._inorder_nodes():
+            bloom.add(node.key)
+        for key in self._buffer:
+            bloom.add(key)
+        self._bloom = bloom
+        self._bloom_removed = 0
+
+    def _bloom_forget(self, removed):
+        """
+        Notes that removed items left the tree. Their keys stay in
+        the filter, so it is rebuilt once a quarter of its keys
+        are gone.
+        """
+        if self._bloom is None:
+            return
+        self._bloom_removed += removed
+        if 4 * self._bloom_removed > len(self._bloom):
+            self._rebuild_bloom()
+
+    def _index_node(self, node):
+        """
+        Enters node in the hash index, if self has one and no
+        other node holds its key yet, and returns node.
+        """
+        if self._index is not None:
+            self._index.setdefault(node.key, node)
+        return node
+
+    def _rebuild_index(self):
+        """Rebuilds the hash index, if self has one, from the tree."""
+        if self._index is None:
+            return
+        index = dict()
+        for node in self._inorder_nodes():
+            index.setdefault(node.key, node)
+        self._index = index
+
+    def _reindex(self):
+        """
+        Rebuilds the Bloom filter and the hash index, whichever
+        self has, after the tree was assembled wholesale.
+        """
+        self._rebuild_bloom()
+        self._rebuild_index()
+
+    def __getstate__(self):
+        """
+        Returns the pickled state of self: the items in order, their
+        counts in a multiset tree, and the shape of the tree packed
+        two bits per node in preorder, instead of the nested nodes.
+        """
+        self.flush("merge")
+        state = dict(self.__dict__)
+        del state["_root"]
+        # hash() of a string differs between processes, and the
+        # index refers to the nodes.
+        state["_bloom"] = None
+        state["_index"] = None if self._index is None else dict()
+        items = list()
+        counts = list()
+        shape = bytearray((self._size + 3) // 4)
+        index = 0
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            flags = (node.left is not None) | (node.right is not None) << 1
+            shape[index >> 2] |= flags << ((index & 3) << 1)
+            index += 1
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+        for node in self._inorder_nodes():
+            items.append(node.data)
+            counts.append(node.count)
+        state["items"] = items
+        state["counts"] = counts if len(counts) < self._size else None
+        state["shape"] = bytes(shape[:(len(items) + 3) // 4])
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores self from the state made by __getstate__,
+        rebuilding the nodes in linear time without recursion.
+        """
+        state = dict(state)
+        items = state.pop("items")
+        counts = state.pop("counts")
+        shape = state.pop("shape")
+        self.__dict__.update(state)
+        self._root = None
+        flags = [byte >> shift & 3 for byte in shape for shift in (0, 2, 4, 6)]
+        key_func = self._key
+        waiting = list()
+        parent = None
+        on_left = False
+        index = 0
+        for position in range(len(items)):
+            node = BSTNode(None)
+            if parent is None:
+                self._root = node
+            elif on_left:
+                parent.left = node
+            else:
+                parent.right = node
+            node_flags = flags[position]
+            if node_flags & 1:
+                # The node gets its item once its left subtree is done.
+                waiting.append((node, node_flags))
+                parent, on_left = node, True
+                continue
+            while True:
+                node.data = data = items[index]
+                node.key = data if key_func is None else key_func(data)
+                if counts is not None:
+                    node.count = counts[index]
+                index += 1
+                if node_flags & 2 or not waiting:
+                    break
+                node, node_flags = waiting.pop()
+            parent, on_left = node, False
+        self._reindex()
+
     def __str__(self):
         """Returns a string representation with the tree rotated
         90 degrees counterclockwise."""
+        buffer = StringIO()
+        self.dump(buffer)
+        return buffer.getvalue()
 
-        def recurse(node, level):
-            tree = ""
-            if node != None:
-                tree += recurse(node.right, level + 1)
-                tree += "| " * level
-                tree += str(node.data) + "\n"
-                tree += recurse(node.left, level + 1)
-            return tree
+    def __add__(self, other):
+        """Returns a new tree with the options of self, containing
+        the contents of self and other."""
+        result = self._new_tree()
+        for item in self:
+            result.add(item)
+        for item in other:
+            result.add(item)
+        return result
 
-        return recurse(self._root, 0)
+    def dump(self, file=None, max_depth=None, max_nodes=None):
+        """
+        Writes the tree rotated 90 degrees counterclockwise to file
+        (sys.stdout by default), one line per node, without recursion.
+        Subtrees deeper than max_depth are written as a single "..."
+        line, and the output stops with "..." after max_nodes nodes.
+        """
+        self.flush("merge")
+        if file is None:
+            file = sys.stdout
+        write = file.write
+        stack = list()
+        node = self._root
+        level = 0
+        written = 0
+        while True:
+            while node is not None:
+                if max_depth is not None and level > max_depth:
+                    write("| " * level + "...\n")
+                    break
+                stack.append((node, level))
+                node = node.right
+                level += 1
+            if not stack:
+                return
+            node, level = stack.pop()
+            if max_nodes is not None and written >= max_nodes:
+                write("...\n")
+                return
+            if node.count > 1:
+                write("| " * level + str(node.data) +
+                      " x" + str(node.count) + "\n")
+            else:
+                write("| " * level + str(node.data) + "\n")
+            written += 1
+            node = node.left
+            level += 1
+
+    def shape(self):
+        """
+        Returns a list whose i-th element is the number of nodes
+        at depth i.
+        """
+        self.flush("merge")
+        counts = list()
+        level = [self._root] if self._root is not None else []
+        while level:
+            counts.append(len(level))
+            next_level = list()
+            for node in level:
+                if node.left is not None:
+                    next_level.append(node.left)
+                if node.right is not None:
+                    next_level.append(node.right)
+            level = next_level
+        return counts
 
     def __iter__(self):
-        """Supports a preorder traversal on a view of self."""
+        """Supports a preorder traversal on a view of self.
+        Raises: RuntimeError if self changes during iteration."""
+        self.flush("merge")
+        modcount = self._modcount
         if not self.isEmpty():
             stack = LinkedStack()
-            stack.push(self._root)
-            while not stack.isEmpty():
-                node = stack.pop()
-                yield node.data
-                if node.right != None:
-                    stack.push(node.right)
-                if node.left != None:
-                    stack.push(node.left)
+            push, pop = stack.push, stack.pop
+            push(self._root)
+            while len(stack):
+                node = pop()
+                for _ in range(node.count):
+                    yield node.data
+                if self._modcount != modcount:
+                    raise RuntimeError("Tree changed during iteration.")
+                if node.right is not None:
+                    push(node.right)
+                if node.left is not None:
+                    push(node.left)
 
     def preorder(self):
         """Supports a preorder traversal on a view of self."""
-        return None
+        return iter(self)
 
     def inorder(self):
-        """Supports an inorder traversal on a view of self."""
-        lyst = list()
-
-        def recurse(node):
-            if node != None:
-                recurse(node.left)
-                lyst.append(node.data)
-                recurse(node.right)
-
-        recurse(self._root)
-        return iter(lyst)
+        """Supports an inorder traversal on a view of self.
+        Raises: RuntimeError if self changes during iteration."""
+        self.flush("merge")
+        modcount = self._modcount
+        stack = list()
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            for _ in range(node.count):
+                yield node.data
+            if self._modcount != modcount:
+                raise RuntimeError("Tree changed during iteration.")
+            node = node.right
 
     def postorder(self):
-        """Supports a postorder traversal on a view of self."""
-        return None
+        """Supports a postorder traversal on a view of self.
+        Raises: RuntimeError if self changes during iteration."""
+        self.flush("merge")
+        modcount = self._modcount
+        stack = list()
+        node = self._root
+        last = None
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack[-1]
+            if node.right is not None and node.right is not last:
+                node = node.right
+                continue
+            stack.pop()
+            for _ in range(node.count):
+                yield node.data
+            if self._modcount != modcount:
+                raise RuntimeError("Tree changed during iteration.")
+            last = node
+            node = None
 
     def levelorder(self):
-        """Supports a levelorder traversal on a view of self."""
-        return None
+        """Supports a levelorder traversal on a view of self.
+        Raises: RuntimeError if self changes during iteration."""
+        self.flush("merge")
+        modcount = self._modcount
+        if not self.isEmpty():
+            queue = LinkedQueue()
+            queue.add(self._root)
+            while len(queue):
+                node = queue.pop()
+                for _ in range(node.count):
+                    yield node.data
+                if self._modcount != modcount:
+                    raise RuntimeError("Tree changed during iteration.")
+                if node.left is not None:
+                    queue.add(node.left)
+                if node.right is not None:
+                    queue.add(node.right)
 
     def __contains__(self, item):
         """Returns True if target is found or False otherwise."""
@@ -81,57 +399,250 @@ class LinkedBST(AbstractCollection):
     def find(self, item):
         """If item matches an item in self, returns the
         matched item, or None otherwise."""
-
-        def recurse(node):
-            if node is None:
-                return None
-            elif item == node.data:
+        key = self._key_of(item)
+        if self._bloom is not None and key not in self._bloom:
+            return None
+        if self._buffered:
+            items = self._buffer.get(key)
+            if items:
+                return items[0]
+        if self._index is not None:
+            node = self._index.get(key)
+            return None if node is None else node.data
+        node = self._root
+        while node is not None:
+            if key == node.key:
                 return node.data
-            elif item < node.data:
-                return recurse(node.left)
+            elif key < node.key:
+                node = node.left
             else:
-                return recurse(node.right)
-
-        return recurse(self._root)
+                node = node.right
+        return None
 
     def clear(self):
         """Makes self become empty."""
         self._root = None
         self._size = 0
+        self._buffer.clear()
+        self._buffered = 0
+        self._buffer_keys = None
+        self._modcount += 1
+        self._reindex()
 
     def add(self, item):
-        """Adds item to the tree."""
+        """Adds item to the tree. In a multiset tree an item
+        equal to an existing one only increments its count.
+        In a buffered tree the item goes to the write buffer,
+        which is flushed once it is full."""
+        key = self._key_of(item)
+        self._size += 1
+        self._modcount += 1
+        if self._buffer_size > 0:
+            items = self._buffer.get(key)
+            if items is None:
+                self._buffer[key] = [item]
+                if self._buffer_keys is not None:
+                    insort(self._buffer_keys, key)
+            else:
+                items.append(item)
+            self._buffered += 1
+            if self._buffered >= self._buffer_size and \
+                    self._buffered >= self._buffer_ratio * \
+                    (self._size - self._buffered):
+                self.flush()
+        else:
+            self._insert(item, key)
+        if self._bloom is not None:
+            # Only after linking, so that a rebuild sees the key.
+            self._bloom.add(key)
+            if len(self._bloom) > self._bloom.capacity():
+                self._rebuild_bloom()
 
-        def recurse(node):
-            """
-            Helper function to search for item's position.
-            """
-            if item < node.data:
-                if node.left == None:
-                    node.left = BSTNode(item)
-                else:
-                    recurse(node.left)
-            elif node.right == None:
-                node.right = BSTNode(item)
+    def _insert(self, item, key):
+        """Links item, ordered by key, into the tree."""
+        if self._root is None:
+            self._root = self._index_node(BSTNode(item, key=key))
+            return
+        multiset = self._multiset
+        node = self._root
+        while True:
+            if multiset and key == node.key:
+                node.count += 1
+                return
+            if key < node.key:
+                if node.left is None:
+                    node.left = self._index_node(BSTNode(item, key=key))
+                    return
+                node = node.left
+            elif node.right is None:
+                node.right = self._index_node(BSTNode(item, key=key))
+                return
             else:
-                recurse(node.right)
+                node = node.right
+
+    def flush(self, compaction=None):
+        """
+        Moves the items of the write buffer into the tree, sorting
+        the buffered keys once, with the compaction policy given or
+        else the one of self. With "rebuild" they are merged with
+        the nodes in order and the whole tree is relinked balanced,
+        in linear time. With "merge" the sorted keys are pushed down
+        the tree together, split at every node they pass, and each
+        run that reaches an empty subtree is linked there as a
+        balanced subtree; this skips the untouched subtrees but does
+        not rebalance the tree. Reads that need the buffer flushed
+        use "merge", so only a full buffer pays for a rebuild.
+        """
+        if not self._buffered:
+            return
+        buffer = self._buffer
+        keys = self._sorted_buffer_keys()
+        self._buffer = dict()
+        self._buffered = 0
+        self._buffer_keys = None
+        self._modcount += 1
+        multiset = self._multiset
 
-        if self.isEmpty():
-            self._root = BSTNode(item)
+        def new_nodes(key):
+            """Returns the nodes for the buffered items of key."""
+            items = buffer[key]
+            if not multiset:
+                return [self._index_node(BSTNode(item, key=key))
+                        for item in items]
+            node = self._index_node(BSTNode(items[0], key=key))
+            node.count = len(items)
+            return [node]
+
+        def subtree(low, high):
+            """Returns a balanced subtree of the items of
+            keys[low:high]."""
+            nodes = list()
+            for key in keys[low:high]:
+                nodes.extend(new_nodes(key))
+            return self._build_balanced(nodes)
+
+        if self._root is None:
+            self._root = subtree(0, len(keys))
+        elif (compaction or self._compaction) == "merge":
+            stack = [(self._root, 0, len(keys))]
+            while stack:
+                node, low, high = stack.pop()
+                middle = bisect_left(keys, node.key, low, high)
+                after = middle
+                if multiset and middle < high and keys[middle] == node.key:
+                    node.count += len(buffer[node.key])
+                    after += 1
+                if low < middle:
+                    if node.left is None:
+                        node.left = subtree(low, middle)
+                    else:
+                        stack.append((node.left, low, middle))
+                if after < high:
+                    if node.right is None:
+                        node.right = subtree(after, high)
+                    else:
+                        stack.append((node.right, after, high))
         else:
-            recurse(self._root)
-        self._size += 1
+            nodes = list()
+            index = 0
+            for node in self._inorder_nodes():
+                while index < len(keys) and keys[index] < node.key:
+                    nodes.extend(new_nodes(keys[index]))
+                    index += 1
+                nodes.append(node)
+                if multiset and index < len(keys) and \
+                        keys[index] == node.key:
+                    node.count += len(buffer[node.key])
+                    index += 1
+            for key in keys[index:]:
+                nodes.extend(new_nodes(key))
+            self._root = self._build_balanced(nodes)
+
+    def _sorted_buffer_keys(self):
+        """
+        Returns the sorted keys of the write buffer, sorting them
+        only once until the next flush; add and remove keep the
+        sorted copy up to date.
+        """
+        if self._buffer_keys is None:
+            self._buffer_keys = sorted(self._buffer)
+        return self._buffer_keys
+
+    def count(self, item):
+        """Returns the number of items in self equal to item."""
+        key = self._key_of(item)
+        if self._bloom is not None and key not in self._bloom:
+            return 0
+        total = len(self._buffer.get(key, ())) if self._buffered else 0
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            while node is not None:
+                if key < node.key:
+                    node = node.left
+                elif node.key < key:
+                    node = node.right
+                else:
+                    # Without counting, equal keys may sit on
+                    # both sides after a rebalance.
+                    total += node.count
+                    stack.append(node.left)
+                    node = node.right
+        return total
 
     def remove(self, item):
         """Precondition: item is in self.
         Raises: KeyError if item is not in self.
-        postcondition: item is removed from self."""
-        if not item in self:
-            raise KeyError("Item not in tree.""")
+        postcondition: item is removed from self.
+        The node is found and unlinked in a single descent."""
+        key = self._key_of(item)
+        if self._bloom is not None and key not in self._bloom:
+            raise KeyError("Item not in tree.")
+        if self._buffered and key in self._buffer:
+            items = self._buffer[key]
+            item_removed = items.pop()
+            if not items:
+                del self._buffer[key]
+                if self._buffer_keys is not None:
+                    self._buffer_keys.pop(
+                        bisect_left(self._buffer_keys, key))
+            self._buffered -= 1
+            self._size -= 1
+            self._modcount += 1
+            self._bloom_forget(1)
+            return item_removed
+        parent = None
+        node = self._root
+        while node is not None and not key == node.key:
+            parent = node
+            if key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        if node is None:
+            raise KeyError("Item not in tree.")
+
+        item_removed = node.data
+        self._size -= 1
+        self._modcount += 1
+        self._bloom_forget(1)
+        if node.count > 1:
+            node.count -= 1
+        else:
+            self._unlink(node, parent)
+        return item_removed
+
+    def _unlink(self, node, parent):
+        """
+        Removes node, whose parent is parent (None for the root),
+        from the tree, and keeps the hash index pointing at the
+        nodes that hold each key.
+        """
 
         def liftMaxInLeftSubtreeToTop(top):
             """
             Helper function to adjust placement of an item.
+            Returns the node whose item moved to top.
             """
             parent = top
             current_node = top.left
@@ -139,68 +650,282 @@ class LinkedBST(AbstractCollection):
                 parent = current_node
                 current_node = current_node.right
             top.data = current_node.data
+            top.key = current_node.key
+            top.count = current_node.count
             if parent == top:
                 top.left = current_node.left
             else:
                 parent.right = current_node.left
+            return current_node
 
-        if self.isEmpty(): return None
-
-        item_removed = None
-        pre_root = BSTNode(None)
-        pre_root.left = self._root
-        parent = pre_root
-        direction = 'L'
-        current_node = self._root
-        while not current_node == None:
-            if current_node.data == item:
-                item_removed = current_node.data
-                break
-            parent = current_node
-            if current_node.data > item:
-                direction = 'L'
-                current_node = current_node.left
+        index = self._index
+        key = node.key
+        stale = index is not None and index.get(key) is node
+        if node.left is not None and node.right is not None:
+            moved = liftMaxInLeftSubtreeToTop(node)
+            if index is not None and index.get(moved.key) is moved:
+                index[moved.key] = node
+            if node.key == key:
+                stale = False
+        else:
+            new_child = node.right if node.left is None else node.left
+            if parent is None:
+                self._root = new_child
+            elif parent.left is node:
+                parent.left = new_child
             else:
-                direction = 'R'
-                current_node = current_node.right
+                parent.right = new_child
+        if stale:
+            # Another node may still hold an equal key.
+            other = self._find_node(key)
+            if other is None:
+                del index[key]
+            else:
+                index[key] = other
 
-        if item_removed == None: return None
+    def _find_node(self, key):
+        """Returns a node holding key, or None."""
+        node = self._root
+        while node is not None and not key == node.key:
+            if key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        return node
 
-        if not current_node.left == None \
-                and not current_node.right == None:
-            liftMaxInLeftSubtreeToTop(current_node)
-        else:
+    def remove_many(self, items):
+        """
+        Removes one occurrence of each of items in a single
+        in-order pass, then relinks the remaining nodes into a
+        balanced tree. Items that are not in self are ignored.
+        Returns the number of items removed.
+        """
+        self.flush("merge")
+        keys = sorted(self._key_of(item) for item in items)
+        if not keys or self._root is None:
+            return 0
+        kept = list()
+        removed = 0
+        index = 0
+        for node in self._inorder_nodes():
+            while index < len(keys) and keys[index] < node.key:
+                index += 1
+            while index < len(keys) and keys[index] == node.key \
+                    and node.count > 0:
+                node.count -= 1
+                removed += 1
+                index += 1
+            if node.count > 0:
+                kept.append(node)
+        self._root = self._build_balanced(kept)
+        self._size -= removed
+        self._modcount += 1
+        self._bloom_forget(removed)
+        self._rebuild_index()
+        return removed
 
-            if current_node.left == None:
-                new_child = current_node.right
+    def remove_range(self, low, high):
+        """
+        Removes every item whose key lies between the keys of
+        low and high, inclusive, and returns how many were removed.
+        A short range is unlinked node by node, in O(h) per node,
+        which never makes the tree taller. Past about n / log n
+        nodes the tree is split around the rest of the range, the
+        outer parts are joined and the whole tree is relinked
+        balanced, in O(n); so repeated calls keep it balanced.
+        """
+        self.flush("merge")
+        low, high = self._key_of(low), self._key_of(high)
+        budget = self._size // max(1, self._size.bit_length())
+        removed = 0
+        while True:
+            parent = None
+            found = found_parent = None
+            node = self._root
+            while node is not None:
+                if node.key < low:
+                    parent, node = node, node.right
+                else:
+                    found, found_parent = node, parent
+                    parent, node = node, node.left
+            if found is None or found.key > high or budget == 0:
+                break
+            removed += found.count
+            budget -= 1
+            self._unlink(found, found_parent)
+        if found is not None and not found.key > high:
+            below, rest = self._split_nodes(self._root, low)
+            inside, above = self._split_nodes(rest, high, inclusive=True)
+            removed += self._count_items(inside)
+            if self._index is not None:
+                # Every node of a key in the range is inside.
+                stack = [inside]
+                while stack:
+                    node = stack.pop()
+                    if node is not None:
+                        self._index.pop(node.key, None)
+                        stack.append(node.left)
+                        stack.append(node.right)
+            self._root = self._join_nodes(below, above)
+            self._root = self._build_balanced(list(self._inorder_nodes()))
+        self._size -= removed
+        self._modcount += 1
+        self._bloom_forget(removed)
+        return removed
 
-            else:
-                new_child = current_node.left
+    def split(self, item):
+        """
+        Splits self into two trees, holding the items below item
+        and the items at or above it, and returns them as a tuple.
+        The nodes are moved, not copied, so self becomes empty.
+        Relinking costs one descent; sizing the new trees walks
+        the left one. With a Bloom filter or hash index, both trees
+        rebuild them, which walks every node.
+        """
+        self.flush("merge")
+        left_root, right_root = self._split_nodes(self._root,
+                                                  self._key_of(item))
+        left, right = self._new_tree(), self._new_tree()
+        left._root, right._root = left_root, right_root
+        left._size = self._count_items(left_root)
+        right._size = self._size - left._size
+        left._reindex()
+        right._reindex()
+        self.clear()
+        return left, right
 
-            if direction == 'L':
-                parent.left = new_child
+    @classmethod
+    def join(cls, left, right):
+        """
+        Returns a new tree holding the items of left and right,
+        where every item of left is below every item of right.
+        The nodes are moved, not copied, so left and right become
+        empty. Costs O(h), or O(n) with a Bloom filter or hash
+        index, which are rebuilt over every node of the result.
+        Raises: ValueError if the trees are ordered differently
+        or their ranges overlap.
+        """
+        if left._key is not right._key or \
+                left._multiset != right._multiset:
+            raise ValueError("Trees are ordered differently.")
+        left.flush("merge")
+        right.flush("merge")
+        if left._root is not None and right._root is not None:
+            left_max = left._root
+            while left_max.right is not None:
+                left_max = left_max.right
+            right_min = right._root
+            while right_min.left is not None:
+                right_min = right_min.left
+            if not left_max.key < right_min.key:
+                raise ValueError("Tree ranges overlap.")
+        result = left._new_tree()
+        result._root = cls._join_nodes(left._root, right._root)
+        result._size = left._size + right._size
+        result._reindex()
+        left.clear()
+        right.clear()
+        return result
+
+    def _new_tree(self):
+        """Returns an empty tree with the same options as self."""
+        return type(self)(key=self._key, multiset=self._multiset,
+                          buffer_size=self._buffer_size,
+                          buffer_ratio=self._buffer_ratio,
+                          compaction=self._compaction,
+                          bloom_error_rate=self._bloom_error_rate,
+                          hash_index=self._index is not None)
+
+    @staticmethod
+    def _count_items(node):
+        """
+        Returns the number of items in the subtree rooted at node.
+        """
+        total = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node is not None:
+                total += node.count
+                stack.append(node.left)
+                stack.append(node.right)
+        return total
+
+    @staticmethod
+    def _split_nodes(node, key, inclusive=False):
+        """
+        Splits the subtree rooted at node into the subtree of
+        keys below key (at or below it, if inclusive) and the
+        subtree of the remaining keys, reusing the nodes.
+        Returns both roots; this costs one descent.
+        """
+        left_top = BSTNode(None)
+        right_top = BSTNode(None)
+        left_tail, right_tail = left_top, right_top
+        while node is not None:
+            if node.key < key or (inclusive and node.key == key):
+                left_tail.right = node
+                left_tail = node
+                node = node.right
             else:
-                parent.right = new_child
+                right_tail.left = node
+                right_tail = node
+                node = node.left
+        left_tail.right = None
+        right_tail.left = None
+        return left_top.right, right_top.left
 
-        self._size -= 1
-        if self.isEmpty():
-            self._root = None
-        else:
-            self._root = pre_root.left
-        return item_removed
+    @staticmethod
+    def _join_nodes(left, right):
+        """
+        Joins two subtrees, where every key of left is not greater
+        than any key of right, by lifting the maximum node of left
+        to the top. Returns the new root.
+        """
+        if left is None:
+            return right
+        if right is None:
+            return left
+        parent = None
+        top = left
+        while top.right is not None:
+            parent = top
+            top = top.right
+        if parent is not None:
+            parent.right = top.left
+            top.left = left
+        top.right = right
+        return top
 
     def replace(self, item, new_item):
         """
         If item is in self, replaces it with newItem and
         returns the old item, or returns None otherwise.
+        Raises: ValueError if newItem has a different key than
+        item, since it would then sit out of order.
         """
+        key = self._key_of(item)
+        if not self._key_of(new_item) == key:
+            raise ValueError("Replacement must have the same key.")
+        if self._buffered and key in self._buffer:
+            items = self._buffer[key]
+            old_data = items[0]
+            items[0] = new_item
+            return old_data
+        if self._index is not None:
+            probe = self._index.get(key)
+            if probe is None:
+                return None
+            old_data = probe.data
+            probe.data = new_item
+            return old_data
         probe = self._root
         while probe != None:
-            if probe.data == item:
+            if probe.key == key:
                 old_data = probe.data
                 probe.data = new_item
                 return old_data
-            elif probe.data > item:
+            elif probe.key > key:
                 probe = probe.left
             else:
                 probe = probe.right
@@ -208,63 +933,78 @@ class LinkedBST(AbstractCollection):
 
     def height(self):
         '''
-        Return the height of tree
+        Return the height of tree, level by level, so a degenerate
+        tree does not hit the recursion limit
         :return: int
         '''
-
-        def height1(top):
-            '''
-            Helper function
-            :param top:
-            :return:
-            '''
-            if top is None:
-                return -1
-            else:
-                return 1 + max(height1(top.left), height1(top.right))
-        return height1(self._root)
+        return len(self.shape()) - 1
 
     def is_balanced(self):
         '''
         Return True if tree is balanced
         :return:
         '''
+        from math import log
+
         height = self.height()
         size = self._size
         return height < 2 * log(size + 1, 2) - 1
 
     def rangeFind(self, low, high):
         '''
-        Returns a list of the items in the tree, where low <= item <= high."""
+        Returns a list of the items in the tree, where low <= item <= high.
         :param low:
         :param high:
         :return:
         '''
+        return self.range_find(low, high)
 
     def rebalance(self):
         '''
-        Rebalances the tree.
+        Rebalances the tree by relinking its existing nodes,
+        so no key is computed again.
         :return:
         '''
-        data_lst = [item for item in self.inorder()]
-        self.clear()
+        self.flush("merge")
+        self._root = self._build_balanced(list(self._inorder_nodes()))
+        self._modcount += 1
+        return self
+
+    def _inorder_nodes(self):
+        """
+        Yields the nodes of the tree in order, without recursion.
+        """
+        stack = list()
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
+
+    @staticmethod
+    def _build_balanced(nodes):
+        """
+        Links the sorted list of nodes into a balanced subtree
+        and returns its root.
+        """
 
-        def middle_item(lst: list):
+        def middle_node(low, high):
             """
-            Adds middle item of the list to
-            the tree.
+            Makes the middle node of nodes[low:high] the root of
+            the subtree built from that slice.
             """
-            if len(lst) == 0:
-                return True
-            mid_index = len(lst)//2
-            left = lst[:mid_index]
-            right = lst[mid_index+1:]
-            self.add(lst[mid_index])
-            middle_item(left)
-            middle_item(right)
-
-        middle_item(data_lst)
-        return self
+            if low >= high:
+                return None
+            mid_index = (low + high) // 2
+            node = nodes[mid_index]
+            node.left = middle_node(low, mid_index)
+            node.right = middle_node(mid_index + 1, high)
+            return node
+
+        return middle_node(0, len(nodes))
 
     def successor(self, item):
         """
@@ -275,11 +1015,22 @@ class LinkedBST(AbstractCollection):
         :return:
         :rtype:
         """
-        data_lst = [item for item in self.inorder()]
-        for data in data_lst:
-            if data > item:
-                return data
-        return None
+        key = self._key_of(item)
+        found = None
+        node = self._root
+        while node is not None:
+            if node.key > key:
+                found = node
+                node = node.left
+            else:
+                node = node.right
+        if self._buffered:
+            keys = self._sorted_buffer_keys()
+            index = bisect_right(keys, key)
+            if index < len(keys) and \
+                    (found is None or keys[index] < found.key):
+                return self._buffer[keys[index]][0]
+        return None if found is None else found.data
 
     def predecessor(self, item):
         """
@@ -290,37 +1041,129 @@ class LinkedBST(AbstractCollection):
         :return:
         :rtype:
         """
-        data_lst = [item for item in self.inorder()][::-1]
-        for data in data_lst:
-            if data < item:
-                return data
-        return None
+        key = self._key_of(item)
+        found = None
+        node = self._root
+        while node is not None:
+            if node.key < key:
+                found = node
+                node = node.right
+            else:
+                node = node.left
+        if self._buffered:
+            keys = self._sorted_buffer_keys()
+            index = bisect_left(keys, key) - 1
+            if index >= 0 and (found is None or found.key < keys[index]):
+                return self._buffer[keys[index]][0]
+        return None if found is None else found.data
 
     def range_find(self, num1, num2):
         """
         Gets two numbers, which establish
         range in which numbers would be found.
+        Only the subtrees that overlap the range are visited,
+        and buffered items are merged in without a flush.
         """
-        # data_lst = [item for item in self.inorder()]
-        result_lst = [item for item in self.inorder() if num1 <= item <= num2]
+        low, high = self._key_of(num1), self._key_of(num2)
+        buffered = list()
+        if self._buffered:
+            keys = self._sorted_buffer_keys()
+            buffered = keys[bisect_left(keys, low):bisect_right(keys, high)]
+        waiting = 0
+        result_lst = list()
+        stack = list()
+        node = self._root
+        while True:
+            while node is not None:
+                if node.key < low:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.key > high:
+                break
+            while waiting < len(buffered) and buffered[waiting] < node.key:
+                result_lst.extend(self._buffer[buffered[waiting]])
+                waiting += 1
+            result_lst.append(node.data)
+            if node.count > 1:
+                result_lst.extend([node.data] * (node.count - 1))
+            node = node.right
+        for key in buffered[waiting:]:
+            result_lst.extend(self._buffer[key])
         return result_lst
 
+    def memory_usage(self, deep=False):
+        """
+        Returns a dict describing the memory held by self, in bytes:
+        the number of nodes and bytes per node, the node total, the
+        keys stored apart from their items, the tree object itself,
+        and the sum of those. If deep is True, the items are sized
+        too, each distinct object once. Walks the tree without
+        recursion.
+        """
+        self.flush("merge")
+        nodes = 0
+        key_bytes = 0
+        item_bytes = 0
+        seen = set()
+        for node in self._inorder_nodes():
+            nodes += 1
+            if node.key is not node.data and id(node.key) not in seen:
+                seen.add(id(node.key))
+                key_bytes += sys.getsizeof(node.key)
+            if deep and id(node.data) not in seen:
+                seen.add(id(node.data))
+                item_bytes += sys.getsizeof(node.data)
+        bytes_per_node = sys.getsizeof(BSTNode(None))
+        container_bytes = sys.getsizeof(self) + \
+            sys.getsizeof(vars(self)) + sys.getsizeof(self._buffer)
+        if self._bloom is not None:
+            container_bytes += sys.getsizeof(self._bloom)
+        if self._index is not None:
+            container_bytes += sys.getsizeof(self._index)
+        usage = {"nodes": nodes,
+                 "bytes_per_node": bytes_per_node,
+                 "node_bytes": nodes * bytes_per_node,
+                 "key_bytes": key_bytes,
+                 "container_bytes": container_bytes}
+        if deep:
+            usage["item_bytes"] = item_bytes
+        usage["total_bytes"] = usage["node_bytes"] + key_bytes + \
+            container_bytes + item_bytes
+        return usage
+
     def random_words(self, path: str):
         """
-        Return list of 10000 random words.
+        Return list of words from the file and
+        list of 10000 random words from it.
         """
+        from random import choices
+
         lst = list()
         with open(path, 'r', encoding='utf-8') as file:
             for line in file:
-                lst.append(line)
+                lst.append(line.rstrip("\n"))
         return lst, choices(lst, k=10000)
 
     def search_in_lst(self, lst, word_lst):
         """
-        Gets the path to file and list of words
-        what are needed to be found.
+        Gets the dictionary (a list or a tree) and list of words
+        what are needed to be found, and returns the time spent.
         """
+        from time import perf_counter
 
+        start_time = perf_counter()
+        if isinstance(lst, list):
+            for item in word_lst:
+                lst.index(item)
+        else:
+            for item in word_lst:
+                lst.find(item)
+        return perf_counter() - start_time
 
     def demo_bst(self, path):
         """
@@ -330,9 +1173,28 @@ class LinkedBST(AbstractCollection):
         :return:
         :rtype:
         """
-        lists_tuple = file_into_lst(path)
-         
-        
+        from random import shuffle
+
+        word_lst, searched_words = self.random_words(path)
+        lst_time = self.search_in_lst(word_lst, searched_words)
+
+        sorted_tree = LinkedBST(word_lst)
+        sorted_tree_time = self.search_in_lst(sorted_tree, searched_words)
+
+        shuffle(word_lst)
+        unsorted_tree = LinkedBST(word_lst)
+        unsorted_tree_time = self.search_in_lst(unsorted_tree,
+                                                searched_words)
+
+        balanced_tree = unsorted_tree.rebalance()
+        balanced_tree_time = self.search_in_lst(balanced_tree,
+                                                searched_words)
+
+        return f"Time spent to find words in list: {lst_time}.\n\
+Time spent to find words in the tree, sorted by the alphabet: {sorted_tree_time}.\n\
+Time spent to find words in the unsorted tree: {unsorted_tree_time}.\n\
+Time spent to find words in the balanced tree: {balanced_tree_time}."
+
 
 if __name__ == "__main__":
     a = LinkedBST()
@@ -345,4 +1207,4 @@ if __name__ == "__main__":
     # print(a.predecessor(2))
     # print(a.height())
     # print(a.rebalance())
-    # a.demo_bst('words (1).txt')
\ No newline at end of file
+    # print(a.demo_bst('words.txt'))
\ No newline at end of file
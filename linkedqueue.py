@@ -3,57 +3,49 @@ File: linkedqueue.py
 Author: Ken Lambert
 """
 
-# from node import Node
+from collections import deque
 from abstractcollection import AbstractCollection
-class Node(object):
-    """Represents a singly linked node."""
-
-    def __init__(self, data, next = None):
-        self.data = data
-        self.next = next
 
 class LinkedQueue(AbstractCollection):
-    """A link-based queue implementation."""
+    """A queue implementation backed by collections.deque.
+
+    The interface is the one of the classic link-based queue, while
+    add and pop are O(1) operations on a deque of fixed-size blocks."""
 
     # Constructor
     def __init__(self, sourceCollection = None):
         """Sets the initial state of self, which includes the
         contents of sourceCollection, if it's present."""
-        self._front = self._rear = None
+        self._items = deque()
         AbstractCollection.__init__(self, sourceCollection)
 
     # Accessor methods
+    def __len__(self):
+        """Returns the number of items in self."""
+        return len(self._items)
+
     def __iter__(self):
-        """Supports iteration over a view of self."""
-        cursor = self._front
-        while not cursor is None:
-            yield cursor.data
-            cursor = cursor.next
-        
+        """Supports iteration over a view of self, from front
+        to rear."""
+        return iter(list(self._items))
+
     def peek(self):
         """
         Returns the item at the front of the queue.
         Precondition: the queue is not empty.
-        Raises: KeyError if the stack is empty."""
-        if self.isEmpty():
+        Raises: KeyError if the queue is empty."""
+        if not self._items:
             raise KeyError("The queue is empty.")
-        return self._front.data
+        return self._items[0]
 
     # Mutator methods
     def clear(self):
         """Makes self become empty."""
-        self._size = 0
-        self._front = self._rear = None
+        self._items.clear()
 
     def add(self, item):
         """Adds item to the rear of the queue."""
-        newNode = Node(item, None)
-        if self.isEmpty():
-            self._front = newNode
-        else:
-            self._rear.next = newNode
-        self._rear = newNode
-        self._size += 1
+        self._items.append(item)
 
     def pop(self):
         """
@@ -61,13 +53,6 @@ class LinkedQueue(AbstractCollection):
         Precondition: the queue is not empty.
         Raises: KeyError if the queue is empty.
         Postcondition: the front item is removed from the queue."""
-        if self.isEmpty():
+        if not self._items:
             raise KeyError("The queue is empty.")
-        oldItem = self._front.data
-        self._front = self._front.next
-        if self._front is None:
-            self._rear = None
-        self._size -= 1
-        return oldItem
-        
-        
+        return self._items.popleft()
@@ -3,58 +3,49 @@ File: linkedstack.py
 Author: Ken Lambert
 """
 
-# from node import Node
 from abstractstack import AbstractStack
-class Node(object):
-    """Represents a singly linked node."""
-
-    def __init__(self, data, next = None):
-        self.data = data
-        self.next = next
 
 class LinkedStack(AbstractStack):
-    """A link-based stack implementation."""
+    """A stack implementation backed by a growable array.
+
+    The interface is the one of the classic link-based stack, but
+    push and pop are amortized O(1) appends and pops at the end of a
+    Python list, so no node object is allocated per push."""
 
     # Constructor
     def __init__(self, sourceCollection = None):
         """Sets the initial state of self, which includes the
         contents of sourceCollection, if it's present."""
-        self._items = None
+        self._items = list()
         AbstractStack.__init__(self, sourceCollection)
 
     # Accessor methods
+    def __len__(self):
+        """Returns the number of items in self."""
+        return len(self._items)
+
     def __iter__(self):
-        """Supports iteration over a view of self."""
-        
-        def visitNodes(node):
-            """Adds items to tempList from tail to head."""
-            if not node is None:
-                visitNodes(node.next)
-                tempList.append(node.data)
-                
-        tempList = list()                
-        visitNodes(self._items)
-        return iter(tempList)
+        """Supports iteration over a view of self, from bottom
+        to top."""
+        return iter(list(self._items))
 
     def peek(self):
         """
         Returns the item at the top of the stack.
         Precondition: the stack is not empty.
         Raises: KeyError if the stack is empty."""
-        if self.isEmpty():
+        if not self._items:
             raise KeyError("The stack is empty.")
-        return self._items.data
+        return self._items[-1]
 
     # Mutator methods
     def clear(self):
         """Makes self become empty."""
-        self._size = 0
-        self._items = None
+        self._items.clear()
 
     def push(self, item):
         """Adds item to the top of the stack."""
-        self._items = Node(item, self._items)
-        self._size += 1
+        self._items.append(item)
 
     def pop(self):
         """
@@ -62,11 +53,6 @@ class LinkedStack(AbstractStack):
         Precondition: the stack is not empty.
         Raises: KeyError if the stack is empty.
         Postcondition: the top item is removed from the stack."""
-        if self.isEmpty():
+        if not self._items:
             raise KeyError("The stack is empty.")
-        data = self._items.data
-        self._items = self._items.next
-        self._size -= 1
-        return data
-        
-        
+        return self._items.pop()
@@ -0,0 +1,87 @@
+"""
+File: parallelbuild.py
+
+Builds a balanced LinkedBST over a very large word file by sorting
+byte ranges of it in worker processes, merging the sorted runs and
+linking the result in linear time.
+
+Each worker reads its own range of the file and sends its run back
+as one newline-joined string, which the parent splits. Sending the
+items one by one would pickle every string twice on the way, and
+for words.txt x8 one such round trip costs about two thirds of the
+whole single-process sort, which leaves no room for a speedup.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from heapq import merge
+import os
+
+from linkedbst import LinkedBST
+
+
+def _sorted_file_run(path, start, end, key=None):
+    """
+    Returns the lines of the file at path that start in the byte
+    range [start, end), sorted by key and joined by newlines; runs
+    in a worker process. A line that crosses end belongs to the
+    range it starts in.
+    """
+    with open(path, "rb") as file:
+        if start:
+            # Skip the rest of a line that starts before start.
+            file.seek(start - 1)
+            file.readline()
+        data = file.read(max(0, end - file.tell()))
+        if data and not data.endswith(b"\n"):
+            data += file.readline()
+    run = [line for line in data.decode("utf-8").split("\n")
+           if line.strip()]
+    run.sort(key=key)
+    return "\n".join(run)
+
+
+def byte_ranges(path, workers):
+    """Splits the file at path into workers byte ranges."""
+    size = os.path.getsize(path)
+    step = max(1, -(-size // workers))
+    return [(start, min(start + step, size))
+            for start in range(0, size, step)]
+
+
+def sorted_runs(path, workers=None, key=None):
+    """
+    Returns the list of the sorted runs of the words of the file
+    at path, one per byte range, each sorted by key in a pool of
+    workers processes. The pool is used even for one worker, so
+    that timings of any worker count pay the same transfer.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = byte_ranges(path, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        runs = executor.map(_sorted_file_run, [path] * len(ranges),
+                            [start for start, _ in ranges],
+                            [end for _, end in ranges],
+                            [key] * len(ranges))
+        return [run.split("\n") if run else [] for run in runs]
+
+
+def parallel_build(path, workers=None, **options):
+    """
+    Returns a balanced LinkedBST holding the words of the file at
+    path, one per line, built from a k-way merge of runs sorted in
+    parallel. The options are passed on to LinkedBST; a key
+    function must be picklable to reach the workers.
+    """
+    key = options.get("key")
+    runs = sorted_runs(path, workers, key)
+    return LinkedBST.from_sorted(merge(*runs, key=key), **options)
+
+
+def synthetic_words(path, copies):
+    """
+    Returns the words of the file at path repeated copies times,
+    each copy made distinct by a numeric suffix, in file order.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        words = [line.rstrip("\n") for line in file if line.strip()]
+    return [f"{word}{copy}" for copy in range(copies) for word in words]
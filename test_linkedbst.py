@@ -0,0 +1,164 @@
+"""
+File: test_linkedbst.py
+
+Unit tests for LinkedBST, checked against a sorted list.
+Run them with: python -m unittest test_linkedbst
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from operator import neg
+import pickle
+import random
+import unittest
+
+from arraybst import ArrayBST
+from linkedbst import LinkedBST
+
+# Tree options of every mode checked against the reference.
+MODES = {"plain": {},
+         "multiset": {"multiset": True},
+         "buffered rebuild": {"buffer_size": 16, "buffer_ratio": 0.05},
+         "buffered merge": {"buffer_size": 16, "buffer_ratio": 0.05,
+                            "compaction": "merge"},
+         "bloom": {"bloom_error_rate": 0.01},
+         "hash index": {"hash_index": True},
+         "hash index multiset": {"hash_index": True, "multiset": True},
+         "key": {"key": neg},
+         "everything": {"multiset": True, "buffer_size": 16,
+                        "buffer_ratio": 0.05, "bloom_error_rate": 0.01,
+                        "hash_index": True}}
+
+
+class ReferenceTest(unittest.TestCase):
+    """Runs seeded random operations on a tree of every mode and
+    on a sorted list of keys, and compares every answer."""
+
+    operations = 3000
+    keys = 400
+
+    def check_mode(self, make_tree, to_key=None, seed=0):
+        to_key = to_key or (lambda item: item)
+        to_item = to_key
+        rand = random.Random(seed)
+        tree = make_tree()
+        ref = list()
+
+        def item_at(index):
+            return to_item(ref[index]) if 0 <= index < len(ref) else None
+
+        for step in range(self.operations):
+            item = rand.randrange(self.keys)
+            key = to_key(item)
+            present = bisect_right(ref, key) - bisect_left(ref, key)
+            choice = rand.random()
+            where = f"step {step}"
+            if choice < 0.35:
+                tree.add(item)
+                insort(ref, key)
+            elif choice < 0.45:
+                if present:
+                    self.assertEqual(tree.remove(item), item, where)
+                    del ref[bisect_left(ref, key)]
+                else:
+                    with self.assertRaises(KeyError, msg=where):
+                        tree.remove(item)
+            elif choice < 0.55:
+                self.assertEqual(tree.find(item),
+                                 item if present else None, where)
+                self.assertEqual(item in tree, bool(present), where)
+                self.assertEqual(tree.count(item), present, where)
+            elif choice < 0.62:
+                self.assertEqual(tree.successor(item),
+                                 item_at(bisect_right(ref, key)), where)
+            elif choice < 0.69:
+                self.assertEqual(tree.predecessor(item),
+                                 item_at(bisect_left(ref, key) - 1), where)
+            elif choice < 0.76:
+                low, high = sorted((key, key + rand.randrange(30)))
+                expected = [to_item(each) for each in
+                            ref[bisect_left(ref, low):
+                                bisect_right(ref, high)]]
+                self.assertEqual(tree.range_find(to_item(low),
+                                                 to_item(high)),
+                                 expected, where)
+            elif choice < 0.79:
+                low, high = sorted((key, key + rand.randrange(10)))
+                start = bisect_left(ref, low)
+                stop = bisect_right(ref, high)
+                self.assertEqual(tree.remove_range(to_item(low),
+                                                   to_item(high)),
+                                 stop - start, where)
+                del ref[start:stop]
+            elif choice < 0.82:
+                items = [rand.randrange(self.keys) for _ in range(5)]
+                removed = 0
+                for each in items:
+                    index = bisect_left(ref, to_key(each))
+                    if index < len(ref) and ref[index] == to_key(each):
+                        del ref[index]
+                        removed += 1
+                self.assertEqual(tree.remove_many(items), removed, where)
+            elif choice < 0.86:
+                self.assertEqual(tree.replace(item, item),
+                                 item if present else None, where)
+            elif choice < 0.88:
+                left, right = tree.split(item)
+                self.assertEqual(len(left), bisect_left(ref, key), where)
+                tree = type(tree).join(left, right)
+            elif choice < 0.90:
+                copy = pickle.loads(pickle.dumps(tree))
+                self.assertEqual(copy.shape(), tree.shape(), where)
+                tree = copy
+            self.assertEqual(len(tree), len(ref), where)
+            if step % 100 == 0:
+                self.assertEqual(list(tree.inorder()),
+                                 [to_item(each) for each in ref], where)
+        self.assertEqual(list(tree.inorder()),
+                         [to_item(each) for each in ref])
+
+    def test_modes(self):
+        for name, options in MODES.items():
+            with self.subTest(mode=name):
+                self.check_mode(lambda: LinkedBST(**options),
+                                options.get("key"))
+
+    def test_array(self):
+        self.check_mode(ArrayBST)
+
+
+class HashIndexTest(unittest.TestCase):
+    """Tests that removals keep the hash index on live nodes."""
+
+    def test_equal_keys_and_lifted_nodes(self):
+        tree = LinkedBST([50, 30, 70, 20, 40, 60, 80, 50, 50],
+                         hash_index=True)
+        # 50 has two children, so 40 is lifted into its node.
+        tree.remove(50)
+        self.assertEqual(tree.find(40), 40)
+        self.assertEqual(tree.find(50), 50)
+        tree.remove(40)
+        tree.remove(50)
+        self.assertEqual(tree.find(50), 50)
+        tree.remove(50)
+        self.assertIsNone(tree.find(50))
+        self.assertEqual(list(tree.inorder()), [20, 30, 60, 70, 80])
+
+
+class BloomFilterTest(unittest.TestCase):
+    """Tests of the Bloom filter in front of lookups."""
+
+    def test_no_false_negatives_across_rebuilds(self):
+        # 1024 is the initial capacity, so these adds rebuild it.
+        for items in (list(range(5000)),
+                      [f"word{number}" for number in range(3000)]):
+            for options in ({}, {"buffer_size": 64}):
+                tree = LinkedBST(bloom_error_rate=0.01, **options)
+                for item in items:
+                    tree.add(item)
+                missing = [item for item in items if item not in tree]
+                self.assertEqual(missing, [])
+                self.assertEqual(tree.remove(items[1024]), items[1024])
+
+
+if __name__ == "__main__":
+    unittest.main()
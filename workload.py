@@ -0,0 +1,261 @@
+"""
+File: workload.py
+
+Seeded operation traces for binary search trees, and a harness
+that replays them against any tree variant.
+
+    python workload.py generate --ops 100000 --distribution zipf \
+        --mix find=0.7,add=0.1,remove=0.1,range=0.1 -o trace.jsonl
+    python workload.py replay trace.jsonl --variant hash_index
+
+A trace is a list of operations: ("add", key), ("find", key),
+("remove", key) and ("range", low, high). It starts with the
+operations that load the tree, in the chosen insert order, and is
+saved one JSON list per line.
+"""
+
+import argparse
+from bisect import bisect_left
+from itertools import accumulate
+import json
+import os
+from random import Random
+import sys
+from time import perf_counter_ns
+
+from linkedbst import LinkedBST
+
+OPERATIONS = ("find", "add", "remove", "range")
+DEFAULT_MIX = {"find": 0.8, "add": 0.1, "remove": 0.05, "range": 0.05}
+DEFAULT_WORDS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "words.txt")
+INSERT_ORDERS = ("random", "sorted", "reversed", "zigzag")
+
+# Tree variants replay can build, as constructor options.
+VARIANTS = {"plain": {},
+            "multiset": {"multiset": True},
+            "buffered": {"buffer_size": 1024},
+            "bloom": {"bloom_error_rate": 0.01},
+            "hash_index": {"hash_index": True},
+            "array": None}
+
+
+def read_keys(path):
+    """Returns the sorted distinct words of the file at path."""
+    with open(path, "r", encoding="utf-8") as file:
+        return sorted({line.rstrip("\n") for line in file if line.strip()})
+
+
+def ordered(keys, order, rand):
+    """
+    Returns keys in the insert order: random, sorted, reversed,
+    or zigzag (smallest, largest, second smallest, ...), which
+    degenerates a plain tree as badly as sorted input.
+    """
+    keys = sorted(keys)
+    if order == "random":
+        rand.shuffle(keys)
+    elif order == "reversed":
+        keys.reverse()
+    elif order == "zigzag":
+        low, high = 0, len(keys) - 1
+        zigzag = list()
+        while low <= high:
+            zigzag.append(keys[low])
+            if low != high:
+                zigzag.append(keys[high])
+            low, high = low + 1, high - 1
+        keys = zigzag
+    elif order != "sorted":
+        raise ValueError(f"Unknown insert order: {order}")
+    return keys
+
+
+def generate_trace(keys, operations=10000, seed=0, distribution="uniform",
+                   zipf_exponent=1.1, mix=None, insert_order="random",
+                   preload=0.5, range_span=50):
+    """
+    Returns a seeded trace over keys. The first preload fraction of
+    keys, in insert_order, is added first; then operations are drawn
+    by mix, with keys picked uniformly or by a Zipf law over a
+    seeded ranking of all the keys. A range covers range_span
+    consecutive keys from the picked one.
+    Raises: ValueError if mix names an unknown operation.
+    """
+    rand = Random(seed)
+    keys = sorted(keys)
+    if not keys:
+        raise ValueError("No keys to draw from.")
+    mix = dict(DEFAULT_MIX if mix is None else mix)
+    unknown = sorted(set(mix) - set(OPERATIONS))
+    if unknown:
+        raise ValueError(f"Unknown operation: {', '.join(unknown)}")
+    loaded = ordered(rand.sample(keys, int(len(keys) * preload)),
+                     insert_order, rand)
+    trace = [("add", key) for key in loaded]
+
+    if distribution == "uniform":
+        def pick():
+            return rand.randrange(len(keys))
+    elif distribution == "zipf":
+        ranking = list(range(len(keys)))
+        rand.shuffle(ranking)
+        weights = list(accumulate(1 / rank ** zipf_exponent
+                                  for rank in range(1, len(keys) + 1)))
+
+        def pick():
+            return ranking[bisect_left(weights,
+                                       rand.random() * weights[-1])]
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+    names = list(mix)
+    cumulative = list(accumulate(mix[name] for name in names))
+    for _ in range(operations):
+        name = rand.choices(names, cum_weights=cumulative)[0]
+        index = pick()
+        if name == "range":
+            high = keys[min(index + range_span, len(keys) - 1)]
+            trace.append(("range", keys[index], high))
+        else:
+            trace.append((name, keys[index]))
+    return trace
+
+
+def save_trace(trace, path):
+    """Writes trace to the file at path, one JSON list per line."""
+    with open(path, "w", encoding="utf-8") as file:
+        for operation in trace:
+            file.write(json.dumps(operation) + "\n")
+
+
+def load_trace(path):
+    """Reads a trace written by save_trace."""
+    with open(path, "r", encoding="utf-8") as file:
+        return [tuple(json.loads(line)) for line in file if line.strip()]
+
+
+def make_tree(variant):
+    """Returns an empty tree of the named variant. The array
+    variant holds numbers only."""
+    if variant == "array":
+        from arraybst import ArrayBST
+
+        return ArrayBST()
+    return LinkedBST(**VARIANTS[variant])
+
+
+def percentile(ordered_values, fraction):
+    """Returns the value at fraction of the sorted ordered_values."""
+    index = min(len(ordered_values) - 1,
+                int(fraction * len(ordered_values)))
+    return ordered_values[index]
+
+
+def replay(trace, tree):
+    """
+    Runs trace against tree and returns a report: the total time
+    and throughput, and per operation its count, misses, and
+    latency percentiles in microseconds. A remove of a missing key
+    counts as a miss.
+    """
+    latencies = {name: list() for name in OPERATIONS}
+    misses = dict.fromkeys(latencies, 0)
+    clock = perf_counter_ns
+    start = clock()
+    for operation in trace:
+        name = operation[0]
+        before = clock()
+        if name == "find":
+            if tree.find(operation[1]) is None:
+                misses[name] += 1
+        elif name == "add":
+            tree.add(operation[1])
+        elif name == "remove":
+            try:
+                tree.remove(operation[1])
+            except KeyError:
+                misses[name] += 1
+        else:
+            if not tree.range_find(operation[1], operation[2]):
+                misses[name] += 1
+        latencies[name].append(clock() - before)
+    seconds = (clock() - start) / 1e9
+    report = {"operations": len(trace), "seconds": seconds,
+              "ops_per_second": len(trace) / seconds if seconds else 0.0}
+    for name, values in latencies.items():
+        if values:
+            values.sort()
+            report[name] = {
+                "count": len(values), "misses": misses[name],
+                "p50_us": percentile(values, 0.50) / 1e3,
+                "p90_us": percentile(values, 0.90) / 1e3,
+                "p99_us": percentile(values, 0.99) / 1e3,
+                "max_us": values[-1] / 1e3}
+    return report
+
+
+def parse_mix(text):
+    """
+    Parses "find=0.8,add=0.2" into a dict of weights.
+    Raises: ValueError if an operation is unknown.
+    """
+    mix = dict()
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    """Runs the command line given in argv, or in sys.argv."""
+    parser = argparse.ArgumentParser(
+        description="Generate and replay tree operation traces.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write a trace")
+    generate.add_argument("--keys", default=DEFAULT_WORDS,
+                          help="word file to draw keys from")
+    generate.add_argument("--synthetic", type=int,
+                          help="draw from 0..N-1 instead of a word file")
+    generate.add_argument("--ops", type=int, default=10000)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--distribution", default="uniform",
+                          choices=("uniform", "zipf"))
+    generate.add_argument("--zipf-exponent", type=float, default=1.1)
+    generate.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                          help="weights such as find=0.8,add=0.2")
+    generate.add_argument("--order", default="random",
+                          choices=INSERT_ORDERS)
+    generate.add_argument("--preload", type=float, default=0.5)
+    generate.add_argument("-o", "--output", required=True)
+
+    run = commands.add_parser("replay", help="replay a trace")
+    run.add_argument("trace")
+    run.add_argument("--variant", choices=sorted(VARIANTS),
+                     action="append",
+                     help="tree to replay against, repeatable; "
+                          "array needs --synthetic keys")
+
+    options = parser.parse_args(argv)
+    if options.command == "generate":
+        keys = list(range(options.synthetic)) if options.synthetic \
+            else read_keys(options.keys)
+        trace = generate_trace(keys, options.ops, options.seed,
+                               options.distribution, options.zipf_exponent,
+                               options.mix, options.order, options.preload)
+        save_trace(trace, options.output)
+        return 0
+
+    trace = load_trace(options.trace)
+    for variant in options.variant or ["plain"]:
+        print(variant, json.dumps(replay(trace, make_tree(variant)),
+                                  indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())